@@ -1,4 +1,8 @@
 import os
+from functools import lru_cache
+from urllib.parse import parse_qs, urlparse
+from numba import njit, prange
+import numpy as np
 import pandas as pd
 import plotly.graph_objs as go
 from dash import Dash, dcc, html, Input, Output
@@ -9,28 +13,141 @@ import plotly.colors as pc
 # ======================
 url = "https://cdn.bancentral.gov.do/documents/entorno-internacional/documents/Serie_Historica_Spread_del_EMBI.xlsx?v=1758230753578"
 
-# Read Excel directly from URL
-df = pd.read_excel(url, sheet_name="Serie Histórica", header=1)
+# Cache the cleaned data next to the app, keyed on the ?v= version of the file
+# and on the cache format. Bump CACHE_SCHEMA whenever load_df() output changes.
+CACHE_SCHEMA = 2
+version = parse_qs(urlparse(url).query).get("v", ["latest"])[0]
+cache_path = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    f"Serie_Historica_Spread_del_EMBI.{version}.v{CACHE_SCHEMA}.parquet"
+)
+
+
+@njit(parallel=True, cache=True)
+def ffill2d(a):
+    # Forward-fill NaNs down each column, in place
+    for j in prange(a.shape[1]):
+        last = np.nan
+        for i in range(a.shape[0]):
+            v = a[i, j]
+            if np.isnan(v):
+                a[i, j] = last
+            else:
+                last = v
+
+
+@njit(cache=True)
+def minmax_decimate(y, edges):
+    # Row indices of the min, max and last point of each bucket
+    # [edges[b], edges[b + 1]), plus the first row
+    keep = np.zeros(y.shape[0], np.bool_)
+    keep[0] = True
+    for b in range(edges.shape[0] - 1):
+        start = edges[b]
+        stop = edges[b + 1]
+        imin = start
+        imax = start
+        for i in range(start + 1, stop):
+            v = y[i]
+            if np.isnan(v):
+                continue
+            if np.isnan(y[imin]) or v < y[imin]:
+                imin = i
+            if np.isnan(y[imax]) or v > y[imax]:
+                imax = i
+        keep[imin] = True
+        keep[imax] = True
+        keep[stop - 1] = True
+    return np.nonzero(keep)[0]
+
 
-# Clean dataframe
-df.rename(columns={df.columns[0]: "Date"}, inplace=True)
-df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-df = df.dropna(axis=1, how="all")
-df.columns = df.columns.astype(str).str.strip()
-df.set_index("Date", inplace=True)
-df = df[~df.index.duplicated(keep="last")]
+@njit(cache=True)
+def last_valid(a, lo, hi, cols):
+    # Last non-missing value of each column in [lo, hi) and its row (-1 if none)
+    m = cols.shape[0]
+    vals = np.full(m, np.nan, np.float32)
+    pos = np.full(m, -1, np.int64)
+    for k in range(m):
+        j = cols[k]
+        for i in range(hi - 1, lo - 1, -1):
+            if not np.isnan(a[i, j]):
+                vals[k] = a[i, j]
+                pos[k] = i
+                break
+    return vals, pos
 
-# Fill missing days
-all_days = pd.date_range(start=df.index.min(), end=df.index.max(), freq="D")
-df = df.reindex(all_days).ffill()
-df.index.name = "Date"
 
-# Convert to integers (basis points)
-df = df.apply(pd.to_numeric, errors="coerce")
-df = (df * 100).round(0).astype("Int64")
+def load_df():
+    # Reuse the cleaned data if this version was already downloaded
+    if os.path.exists(cache_path):
+        return pd.read_parquet(cache_path, engine="pyarrow")
+
+    # Read Excel directly from URL, only Date plus the 20 series in B:U
+    df = pd.read_excel(url, sheet_name="Serie Histórica", header=1, usecols="A:U", engine="calamine")
+
+    # Clean dataframe
+    df.rename(columns={df.columns[0]: "Date"}, inplace=True)
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    df.columns = [str(c).strip() for c in df.columns]
+    df.set_index("Date", inplace=True)
+    df = df.groupby(level=0, sort=False).last()
+
+    # Coerce only the columns Excel left as text ("N/A" and "`" cells).
+    # Text cells are marked +inf, not NaN: ffill2d below must carry them
+    # forward like it would carry the original strings, and the marker is
+    # reset to NaN right after the fill. Those days then stay gaps on the
+    # chart instead of inheriting the previous day's spread.
+    obj_cols = df.select_dtypes(include="object").columns
+    if len(obj_cols):
+        coerced = df[obj_cols].apply(pd.to_numeric, errors="coerce")
+        df[obj_cols] = coerced.mask(coerced.isna() & df[obj_cols].notna(), np.inf)
+
+    # Fill missing days
+    all_days = pd.date_range(start=df.index.min(), end=df.index.max(), freq="D", name="Date")
+    df = df.reindex(all_days)
+    arr = df.to_numpy(dtype="float64", na_value=np.nan, copy=True)
+    ffill2d(arr)
+    arr[np.isinf(arr)] = np.nan  # undo the text-cell marker set above
+
+    # Convert to integers (basis points)
+    np.multiply(arr, 100.0, out=arr)
+    np.round(arr, 0, out=arr)
+    mask = np.isnan(arr)
+    arr[mask] = 0  # NaN has no int64 representation; the mask marks it as missing
+    ints = arr.astype(np.int64, order="F")
+    df = pd.DataFrame(
+        {c: pd.arrays.IntegerArray(ints[:, j], mask[:, j]) for j, c in enumerate(df.columns)},
+        index=df.index
+    )
 
-# Keep only up to column T (20 columns: Date + 19 countries)
-df = df.iloc[:, :20]
+    # Write to a temp file first so concurrent workers never read a partial cache
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(tmp_path, engine="pyarrow", compression="zstd")
+        os.replace(tmp_path, cache_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return df
+
+
+df = load_df()
+
+# Positional lookups for the callbacks
+IDX = df.index.values
+COLUMNS = tuple(df.columns)
+COL_POS = {c: i for i, c in enumerate(COLUMNS)}
+
+# Country values as one column-major float32 block (basis points fit exactly)
+VALUES = np.asfortranarray(df.to_numpy(dtype=np.float32, na_value=np.nan))
+
+# Month-start rows, precomputed: long ranges keep each month's daily min and
+# max instead of every day
+LONG_RANGE_DAYS = 730
+MONTH_START_POS = np.flatnonzero(df.index.is_month_start)
+
+# Dates pre-encoded for the x axis, so Plotly never re-serializes timestamps
+X_STR = df.index.strftime("%Y-%m-%d").to_numpy()
 
 # ======================
 # 2. Create Dash app
@@ -38,17 +155,22 @@ df = df.iloc[:, :20]
 app = Dash(__name__)
 server = app.server  # required for Render / Railway
 
+# Dropdown options and date bounds, computed once (the index is sorted)
+COUNTRY_OPTIONS = tuple({"label": c, "value": c} for c in COLUMNS if c.lower() != "date")
+MIN_DATE = df.index[0]
+MAX_DATE = df.index[-1]
+
 # Default start date (Jan 1, 2025)
 default_start = pd.Timestamp("2025-01-01")
-if default_start < df.index.min():
-    default_start = df.index.min()
+if default_start < MIN_DATE:
+    default_start = MIN_DATE
 
 app.layout = html.Div([
     html.H1("Interactive EMBI Dashboard"),
 
     html.Label("Select Country/Countries:"),
     dcc.Dropdown(
-        options=[{"label": c, "value": c} for c in df.columns if c.lower() != "date"],
+        options=COUNTRY_OPTIONS,
         value=["Ecuador"],  # default
         multi=True,
         id="country-selector"
@@ -57,10 +179,10 @@ app.layout = html.Div([
     html.Label("Select Date Range:"),
     dcc.DatePickerRange(
         id="date-range",
-        min_date_allowed=df.index.min(),
-        max_date_allowed=df.index.max(),
+        min_date_allowed=MIN_DATE,
+        max_date_allowed=MAX_DATE,
         start_date=default_start,  # default Jan 1, 2025
-        end_date=df.index.max()
+        end_date=MAX_DATE
     ),
 
     dcc.Graph(id="embi-graph")
@@ -69,49 +191,65 @@ app.layout = html.Div([
 # ======================
 # 3. Callbacks
 # ======================
-@app.callback(
-    Output("embi-graph", "figure"),
-    Input("country-selector", "value"),
-    Input("date-range", "start_date"),
-    Input("date-range", "end_date")
-)
-def update_graph(selected_countries, start_date, end_date):
-    if not selected_countries:
-        return go.Figure()
+# Fixed part of the last-value annotations (font color is set per country)
+ANNOT_TMPL = dict(showarrow=False, xanchor="left", yanchor="middle")
 
-    dff = df.loc[start_date:end_date, selected_countries]
+# Figures are pure functions of the inputs, so keep the serialized ones around
+@lru_cache(maxsize=256)
+def _build_fig_dict(countries, start_date, end_date):
+    lo = 0 if start_date is None else IDX.searchsorted(np.datetime64(start_date), side="left")
+    hi = len(IDX) if end_date is None else IDX.searchsorted(np.datetime64(end_date), side="right")
+    if hi <= lo:
+        return go.Figure().to_plotly_json()
 
-    fig = go.Figure()
     color_palette = pc.qualitative.Plotly  # default Plotly palette
-    color_map = {country: color_palette[i % len(color_palette)] for i, country in enumerate(selected_countries)}
+    if hi - 1 - lo > LONG_RANGE_DAYS:
+        # One min/max bucket per calendar month in the window
+        a, b = MONTH_START_POS.searchsorted([lo + 1, hi])
+        edges = np.concatenate(([0], MONTH_START_POS[a:b] - lo, [hi - lo]))
+    else:
+        edges = None  # up to two years of daily data is sent as is
+
+    x_str = X_STR[lo:hi]
+    cols_pos = np.array([COL_POS[c] for c in countries], dtype=np.int64)
+    lasts, last_pos = last_valid(VALUES, lo, hi, cols_pos)
 
-    for country in selected_countries:
-        line_color = color_map[country]
+    traces = []
+    annotations = []
+    for k, country in enumerate(countries):
+        line_color = color_palette[k % len(color_palette)]
 
-        # Add line trace with fixed color
-        fig.add_trace(go.Scatter(
-            x=dff.index,
-            y=dff[country],
+        y = VALUES[lo:hi, cols_pos[k]]  # contiguous view, no copy
+        x = x_str
+        if edges is not None:
+            # Keep only the points that change the drawn line
+            keep = minmax_decimate(y, edges)
+            x, y = x_str[keep], y[keep]
+
+        # Line trace with fixed color
+        traces.append(dict(
+            type="scattergl",  # WebGL instead of SVG
+            x=x,
+            y=y,
             mode="lines",
             name=country,
             line=dict(color=line_color)
         ))
 
         # Last value annotation in same color
-        last_date = dff.index[-1]
-        last_value = dff[country].iloc[-1]
-        fig.add_annotation(
-            x=last_date,
-            y=last_value,
-            text=f"{last_value:,}",
-            showarrow=False,
-            xanchor="left",
-            yanchor="middle",
-            font=dict(color=line_color, size=10)
-        )
-
-    # Add source note
-    fig.add_annotation(
+        if last_pos[k] < 0:
+            continue
+        last_value = int(lasts[k])
+        annotations.append({
+            **ANNOT_TMPL,
+            "x": X_STR[last_pos[k]],
+            "y": last_value,
+            "text": format(last_value, ","),
+            "font": dict(color=line_color, size=10)
+        })
+
+    # Source note
+    annotations.append(dict(
         text="<i>Source: Central Bank of Dominican Republic</i>",
         xref="paper",
         yref="paper",
@@ -120,10 +258,10 @@ def update_graph(selected_countries, start_date, end_date):
         showarrow=False,
         font=dict(size=9, color="gray"),
         align="left"
-    )
+    ))
 
-    # Add author note
-    fig.add_annotation(
+    # Author note
+    annotations.append(dict(
         text="<i>Author: Juan-Pablo Erraez</i>",
         xref="paper",
         yref="paper",
@@ -132,19 +270,31 @@ def update_graph(selected_countries, start_date, end_date):
         showarrow=False,
         font=dict(size=9, color="gray"),
         align="left"
-    )
+    ))
 
-    # Layout with white background and light gray grid
-    fig.update_layout(
-        title="EMBI Spread - Selected Countries",
-        xaxis_title="Date",
-        yaxis_title="Spread (basis points)",
+    # Build the figure in one go, white background and light gray grid
+    fig = go.Figure(data=traces, layout=dict(
+        title=dict(text="EMBI Spread - Selected Countries"),
+        xaxis=dict(title=dict(text="Date"), showgrid=True, gridcolor="lightgray"),
+        yaxis=dict(title=dict(text="Spread (basis points)"), showgrid=True, gridcolor="lightgray"),
         hovermode="x unified",
         plot_bgcolor="white",
-        xaxis=dict(showgrid=True, gridcolor="lightgray"),
-        yaxis=dict(showgrid=True, gridcolor="lightgray")
-    )
-    return fig
+        annotations=annotations
+    ))
+    return fig.to_plotly_json()
+
+
+@app.callback(
+    Output("embi-graph", "figure"),
+    Input("country-selector", "value"),
+    Input("date-range", "start_date"),
+    Input("date-range", "end_date")
+)
+def update_graph(selected_countries, start_date, end_date):
+    if not selected_countries:
+        return go.Figure()
+
+    return _build_fig_dict(tuple(selected_countries), start_date, end_date)
 
 # ======================
 # 4. Run server
@@ -1,3 +1,7 @@
+import os
+from functools import lru_cache
+from numba import njit, prange
+import numpy as np
 import pandas as pd
 import plotly.graph_objs as go
 from dash import Dash, dcc, html, Input, Output
@@ -6,36 +10,154 @@ from dash import Dash, dcc, html, Input, Output
 # 1. Cargar y preparar los datos
 # ======================
 file_path = r"C:\Users\JUANER\PycharmProjects\PythonProject\embi\Serie_Historica_Spread_del_EMBI.xlsx"
-df = pd.read_excel(file_path, sheet_name="Serie Histórica", header=1)
+# Subir CACHE_SCHEMA cada vez que cambie el resultado de load_df()
+CACHE_SCHEMA = 2
+cache_path = file_path + f".v{CACHE_SCHEMA}.parquet"
+
+
+@njit(parallel=True, cache=True)
+def ffill2d(a):
+    # Rellenar NaN hacia adelante en cada columna, en el mismo arreglo
+    for j in prange(a.shape[1]):
+        last = np.nan
+        for i in range(a.shape[0]):
+            v = a[i, j]
+            if np.isnan(v):
+                a[i, j] = last
+            else:
+                last = v
+
+
+@njit(cache=True)
+def minmax_decimate(y, edges):
+    # Índices del mínimo, máximo y último punto de cada tramo
+    # [edges[b], edges[b + 1]), más la primera fila
+    keep = np.zeros(y.shape[0], np.bool_)
+    keep[0] = True
+    for b in range(edges.shape[0] - 1):
+        start = edges[b]
+        stop = edges[b + 1]
+        imin = start
+        imax = start
+        for i in range(start + 1, stop):
+            v = y[i]
+            if np.isnan(v):
+                continue
+            if np.isnan(y[imin]) or v < y[imin]:
+                imin = i
+            if np.isnan(y[imax]) or v > y[imax]:
+                imax = i
+        keep[imin] = True
+        keep[imax] = True
+        keep[stop - 1] = True
+    return np.nonzero(keep)[0]
+
+
+@njit(cache=True)
+def last_valid(a, lo, hi, cols):
+    # Último valor no faltante de cada columna en [lo, hi) y su fila (-1 si no hay)
+    m = cols.shape[0]
+    vals = np.full(m, np.nan, np.float32)
+    pos = np.full(m, -1, np.int64)
+    for k in range(m):
+        j = cols[k]
+        for i in range(hi - 1, lo - 1, -1):
+            if not np.isnan(a[i, j]):
+                vals[k] = a[i, j]
+                pos[k] = i
+                break
+    return vals, pos
+
+
+def load_df():
+    # Usar la caché si es más reciente que el Excel
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(file_path):
+        return pd.read_parquet(cache_path, engine="pyarrow")
+
+    # Leer solo Fecha y las 20 series de B:U (más a la derecha hay celdas sueltas sin encabezado)
+    df = pd.read_excel(file_path, sheet_name="Serie Histórica", header=1, usecols="A:U", engine="calamine")
+
+    # Renombrar y limpiar
+    df.rename(columns={df.columns[0]: "Fecha"}, inplace=True)
+    df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
+    df.columns = [str(c).strip() for c in df.columns]
+    df.set_index("Fecha", inplace=True)
+    df = df.groupby(level=0, sort=False).last()
+
+    # Convertir a numéricas solo las columnas que Excel dejó como texto ("N/A" y "`").
+    # Las celdas de texto se marcan con +inf, no NaN: ffill2d debe arrastrarlas
+    # como arrastraría el texto original, y la marca vuelve a NaN justo después
+    # del relleno. Así esos días quedan como huecos en el gráfico en lugar de
+    # heredar el spread del día anterior.
+    obj_cols = df.select_dtypes(include="object").columns
+    if len(obj_cols):
+        coerced = df[obj_cols].apply(pd.to_numeric, errors="coerce")
+        df[obj_cols] = coerced.mask(coerced.isna() & df[obj_cols].notna(), np.inf)
+
+    # Rellenar fechas faltantes
+    all_days = pd.date_range(start=df.index.min(), end=df.index.max(), freq="D", name="Fecha")
+    df = df.reindex(all_days)
+    arr = df.to_numpy(dtype="float64", na_value=np.nan, copy=True)
+    ffill2d(arr)
+    arr[np.isinf(arr)] = np.nan  # deshacer la marca de celdas de texto de arriba
+
+    # Escalar valores (enteros)
+    np.multiply(arr, 100.0, out=arr)
+    np.round(arr, 0, out=arr)
+    mask = np.isnan(arr)
+    arr[mask] = 0  # NaN no existe en int64; la máscara lo marca como faltante
+    ints = arr.astype(np.int64, order="F")
+    df = pd.DataFrame(
+        {c: pd.arrays.IntegerArray(ints[:, j], mask[:, j]) for j, c in enumerate(df.columns)},
+        index=df.index
+    )
+
+    # Guardar la caché para los próximos arranques, vía un archivo temporal
+    # para que nunca se lea una caché a medio escribir
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(tmp_path, engine="pyarrow", compression="zstd")
+        os.replace(tmp_path, cache_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return df
+
+
+df = load_df()
+
+# Búsquedas posicionales para los callbacks
+IDX = df.index.values
+COLUMNS = tuple(df.columns)
+COL_POS = {c: i for i, c in enumerate(COLUMNS)}
 
-# Renombrar y limpiar
-df.rename(columns={df.columns[0]: "Fecha"}, inplace=True)
-df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
-df = df.dropna(axis=1, how="all")
-df.columns = df.columns.astype(str).str.strip()
-df.set_index("Fecha", inplace=True)
-df = df[~df.index.duplicated(keep="last")]
+# Valores por país en un bloque float32 por columnas (los puntos básicos caben exactos)
+VALUES = np.asfortranarray(df.to_numpy(dtype=np.float32, na_value=np.nan))
 
-# Rellenar fechas faltantes
-all_days = pd.date_range(start=df.index.min(), end=df.index.max(), freq="D")
-df = df.reindex(all_days).ffill()
-df.index.name = "Fecha"
+# Inicios de mes precalculados: en rangos largos se conserva el mínimo y el
+# máximo diario de cada mes en lugar de todos los días
+LONG_RANGE_DAYS = 730
+MONTH_START_POS = np.flatnonzero(df.index.is_month_start)
 
-# Convertir columnas a numéricas y escalar valores (enteros)
-df = df.apply(pd.to_numeric, errors="coerce")
-df = (df * 100).round(0).astype("Int64")
+# Fechas ya codificadas para el eje x, así Plotly no re-serializa timestamps
+X_STR = df.index.strftime("%Y-%m-%d").to_numpy()
 
 # ======================
 # 2. Crear la app Dash
 # ======================
 app = Dash(__name__)
 
+# Opciones y límites de fechas, calculados una sola vez (el índice está ordenado)
+COUNTRY_OPTIONS = tuple({"label": c, "value": c} for c in COLUMNS if c.lower() != "fecha")
+MIN_DATE = df.index[0]
+MAX_DATE = df.index[-1]
+
 app.layout = html.Div([
     html.H1("EMBI Dashboard Interactivo"),
 
     html.Label("Seleccionar País(es):"),
     dcc.Dropdown(
-        options=[{"label": c, "value": c} for c in df.columns if c.lower() != "fecha"],
+        options=COUNTRY_OPTIONS,
         value=["Ecuador"],  # valor por defecto
         multi=True,
         id="pais-selector"
@@ -44,10 +166,10 @@ app.layout = html.Div([
     html.Label("Seleccionar Rango de Fechas:"),
     dcc.DatePickerRange(
         id="date-range",
-        min_date_allowed=df.index.min(),
-        max_date_allowed=df.index.max(),
-        start_date=df.index.min(),
-        end_date=df.index.max()
+        min_date_allowed=MIN_DATE,
+        max_date_allowed=MAX_DATE,
+        start_date=MIN_DATE,
+        end_date=MAX_DATE
     ),
 
     dcc.Graph(id="embi-graph")
@@ -56,6 +178,63 @@ app.layout = html.Div([
 # ======================
 # 3. Callbacks para actualizar el gráfico
 # ======================
+# Parte fija de las etiquetas de último valor
+ANNOT_TMPL = dict(showarrow=False, xanchor="left", yanchor="middle", font=dict(color="black", size=10))
+
+# La figura solo depende de las entradas; guardar las ya serializadas
+@lru_cache(maxsize=256)
+def _build_fig_dict(countries, start_date, end_date):
+    lo = 0 if start_date is None else IDX.searchsorted(np.datetime64(start_date), side="left")
+    hi = len(IDX) if end_date is None else IDX.searchsorted(np.datetime64(end_date), side="right")
+    if hi <= lo:
+        return go.Figure().to_plotly_json()
+
+    if hi - 1 - lo > LONG_RANGE_DAYS:
+        # Un tramo de mínimo/máximo por cada mes calendario del rango
+        a, b = MONTH_START_POS.searchsorted([lo + 1, hi])
+        edges = np.concatenate(([0], MONTH_START_POS[a:b] - lo, [hi - lo]))
+    else:
+        edges = None  # hasta dos años de datos diarios se envían completos
+
+    x_str = X_STR[lo:hi]
+    cols_pos = np.array([COL_POS[c] for c in countries], dtype=np.int64)
+    lasts, last_pos = last_valid(VALUES, lo, hi, cols_pos)
+
+    traces = []
+    annotations = []
+    for k, country in enumerate(countries):
+        y = VALUES[lo:hi, cols_pos[k]]  # vista contigua, sin copia
+        x = x_str
+        if edges is not None:
+            # Conservar solo los puntos que cambian la línea dibujada
+            keep = minmax_decimate(y, edges)
+            x, y = x_str[keep], y[keep]
+
+        traces.append(dict(
+            type="scattergl",  # WebGL en lugar de SVG
+            x=x,
+            y=y,
+            mode="lines",
+            name=country
+        ))
+
+        # Último valor, etiqueta más pequeña, sin fondo
+        if last_pos[k] < 0:
+            continue
+        last_value = int(lasts[k])
+        annotations.append({**ANNOT_TMPL, "x": X_STR[last_pos[k]], "y": last_value, "text": str(last_value)})
+
+    # Construir la figura de una sola vez
+    fig = go.Figure(data=traces, layout=dict(
+        title=dict(text="EMBI Spread - Países seleccionados"),
+        xaxis=dict(title=dict(text="Fecha")),
+        yaxis=dict(title=dict(text="Spread (puntos básicos)")),
+        hovermode="x unified",
+        annotations=annotations
+    ))
+    return fig.to_plotly_json()
+
+
 @app.callback(
     Output("embi-graph", "figure"),
     Input("pais-selector", "value"),
@@ -66,39 +245,7 @@ def update_graph(selected_countries, start_date, end_date):
     if not selected_countries:
         return go.Figure()
 
-    dff = df.loc[start_date:end_date, selected_countries]
-
-    fig = go.Figure()
-    for country in selected_countries:
-        fig.add_trace(go.Scatter(
-            x=dff.index,
-            y=dff[country],
-            mode="lines",
-            name=country
-        ))
-
-        # Último valor
-        last_date = dff.index[-1]
-        last_value = dff[country].iloc[-1]
-
-        # Etiqueta más pequeña, sin fondo
-        fig.add_annotation(
-            x=last_date,
-            y=last_value,
-            text=f"{last_value}",
-            showarrow=False,
-            xanchor="left",
-            yanchor="middle",
-            font=dict(color="black", size=10)
-        )
-
-    fig.update_layout(
-        title="EMBI Spread - Países seleccionados",
-        xaxis_title="Fecha",
-        yaxis_title="Spread (puntos básicos)",
-        hovermode="x unified"
-    )
-    return fig
+    return _build_fig_dict(tuple(selected_countries), start_date, end_date)
 
 # ======================
 # 4. Ejecutar servidor